@@ -0,0 +1,27 @@
+"""Production launcher for the API server.
+
+Kept apart from server.py so the app module is only ever imported as
+``server``; running server.py directly would set it up a second time as
+``__main__`` (model load, password hash, Mongo client, log handlers).
+Equivalent command line:
+
+    uvicorn server:app --loop uvloop --http httptools --workers N \
+        --limit-concurrency 1024 --backlog 2048 --port 8001
+"""
+import os
+
+import uvicorn
+
+if __name__ == "__main__":
+    # C event loop and HTTP parser; one worker per core (override with WEB_CONCURRENCY)
+    uvicorn.run(
+        "server:app",
+        app_dir=os.path.dirname(os.path.abspath(__file__)),
+        host=os.environ.get("HOST", "0.0.0.0"),
+        port=int(os.environ.get("PORT", "8001")),
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1)),
+        limit_concurrency=1024,
+        backlog=2048,
+    )
@@ -1,19 +1,32 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Header, status
+from fastapi.responses import ORJSONResponse
 from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.cors import CORSMiddleware
+from starlette.types import Receive, Scope, Send
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import BulkWriteError
 import os
+import asyncio
 import logging
+import logging.handlers
+import operator
+import queue
+import threading
+import time
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Dict, List, Optional, Tuple
 import uuid
-from datetime import datetime, timedelta
+from functools import lru_cache
+from datetime import datetime, timedelta, timezone
 import jwt
 import hashlib
+from cachetools import LRUCache, TTLCache
+from passlib.context import CryptContext
+# Requests are already served concurrently; keep each model call on one thread
+os.environ.setdefault("OMP_NUM_THREADS", "1")
 import catboost
-import pandas as pd
 import numpy as np
 
 ROOT_DIR = Path(__file__).parent
@@ -21,15 +34,35 @@ load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+# Records are telemetry: acknowledge on the primary only, never wait for majority
+client = AsyncIOMotorClient(mongo_url, w=1)
 db = client[os.environ.get('DB_NAME', 'health_surveillance')]
 
+# Model input layout: categorical columns first, then numeric, as trained
+CAT_COLS = ('Location', 'Source_Type')
+NUM_COLS = (
+    'NH4', 'BSK5', 'Suspended', 'O2', 'NO3', 'NO2', 'SO4', 'PO4', 'CL',
+    'pH', 'Turbidity', 'Temperature', 'Year', 'Month', 'Day',
+)
+FEATURE_COLUMNS = CAT_COLS + NUM_COLS
+numeric_features = operator.attrgetter(*NUM_COLS)
+# CatBoost compares numeric features in float32, so inputs are cast once on entry
+NUM_DTYPE = np.float32
+
 # Load CatBoost model
+# Served by CatBoost's own evaluator: the ONNX-ML exporter and Treelite both
+# reject models with categorical features, and Location/Source_Type are ones.
 try:
     model_path = ROOT_DIR / 'outbreak_predictor.cbm'
     if model_path.exists():
         model = catboost.CatBoostClassifier()
         model.load_model(str(model_path))
+        if tuple(model.feature_names_) != FEATURE_COLUMNS:
+            raise ValueError(f"Unexpected model features: {model.feature_names_}")
+        # Warm-up call so lazy initialisation is not paid by the first request
+        model.predict(
+            [("", "") + (0,) * len(NUM_COLS)], prediction_type='Probability', thread_count=1
+        )
         logger = logging.getLogger(__name__)
         logger.info("CatBoost model loaded successfully")
     else:
@@ -43,34 +76,92 @@ except Exception as e:
     logger.error(f"Error loading CatBoost model: {e}")
 
 # Create the main app without a prefix
-app = FastAPI(title="Smart Health Surveillance API", version="1.0.0")
+app = FastAPI(
+    title="Smart Health Surveillance API",
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
 # Security
-security = HTTPBearer()
 SECRET_KEY = os.environ.get('SECRET_KEY', 'your-secret-key-here')
 
+# Salted, iterated password hashing (passlib ships pbkdf2_sha256 natively)
+pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+
+# Recently verified tokens (digest -> (username, exp)); failures are never cached
+token_cache = TTLCache(maxsize=10000, ttl=30)
+token_cache_lock = threading.Lock()
+
+# Record ids
+class EntropyPool:
+    """Serves random bytes out of one large os.urandom read at a time"""
+
+    # 4 KiB per read lasts about 409 ids at 10 random bytes each
+    def __init__(self, size: int = 4096):
+        self._size = size
+        self._buffer = b""
+        self._offset = 0
+        self._lock = threading.Lock()
+
+    def take(self, n: int) -> bytes:
+        with self._lock:
+            if self._offset + n > len(self._buffer):
+                self._buffer = os.urandom(self._size)
+                self._offset = 0
+            start = self._offset
+            self._offset += n
+            return self._buffer[start:self._offset]
+
+entropy_pool = EntropyPool()
+
+def uuid7() -> str:
+    """Time-ordered UUID (version 7): 48-bit ms timestamp followed by random bits"""
+    unix_ms = time.time_ns() // 1_000_000
+    rand = int.from_bytes(entropy_pool.take(10), "big")
+    value = (
+        (unix_ms & 0xFFFF_FFFF_FFFF) << 80
+        | 0x7 << 76                      # version
+        | (rand >> 68) << 64             # rand_a, 12 bits
+        | 0b10 << 62                     # RFC 4122 variant
+        | rand & ((1 << 62) - 1)         # rand_b, 62 bits
+    )
+    return str(uuid.UUID(int=value))
+
 # Define Models
+# Immutable and strict: unknown fields are rejected rather than silently dropped
+MODEL_CONFIG = ConfigDict(frozen=True, extra='forbid')
+
 class StatusCheck(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    model_config = MODEL_CONFIG
+
+    id: str = Field(default_factory=uuid7)
     client_name: str
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class StatusCheckCreate(BaseModel):
+    model_config = MODEL_CONFIG
+
     client_name: str
 
 class LoginRequest(BaseModel):
+    model_config = MODEL_CONFIG
+
     username: str
     password: str
 
 class LoginResponse(BaseModel):
+    model_config = MODEL_CONFIG
+
     access_token: str
     token_type: str = "bearer"
     message: str
 
 class PredictionRequest(BaseModel):
+    model_config = MODEL_CONFIG
+
     # Categorical features
     Location: str
     Source_Type: str
@@ -93,12 +184,29 @@ class PredictionRequest(BaseModel):
     Day: int
 
 class PredictionResponse(BaseModel):
+    model_config = MODEL_CONFIG
+
     prediction: int
     confidence: Optional[float] = None
     risk_level: str
     message: str
 
+# Largest model invocation, and the most rows one /predict/batch call may send
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', '64'))
+
+class BatchPredictionRequest(BaseModel):
+    model_config = MODEL_CONFIG
+
+    rows: List[PredictionRequest] = Field(max_length=MAX_BATCH_SIZE)
+
+class BatchPredictionResponse(BaseModel):
+    model_config = MODEL_CONFIG
+
+    results: List[PredictionResponse]
+
 class NotificationRequest(BaseModel):
+    model_config = MODEL_CONFIG
+
     location: str
     risk_level: str
     message: str
@@ -106,24 +214,39 @@ class NotificationRequest(BaseModel):
 # Helper functions
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(hours=24)
-    to_encode.update({"exp": expire})
+    # Plain Unix seconds, the form the exp claim is encoded and checked in
+    lifetime = int(expires_delta.total_seconds()) if expires_delta else 86400
+    to_encode.update({"exp": int(time.time()) + lifetime})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm="HS256")
     return encoded_jwt
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+def verify_token(authorization: Optional[str] = Header(None)):
+    # Parsed by hand; same 403 responses as fastapi.security.HTTPBearer
+    scheme, _, token = (authorization or "").partition(" ")
+    if not (scheme and token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authenticated")
+    if scheme.lower() != "bearer":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid authentication credentials",
+        )
+
+    key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    with token_cache_lock:
+        cached = token_cache.get(key)
+    if cached is not None and cached[1] > time.time():
+        return cached[0]
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=["HS256"])
-        username: str = payload.get("sub")
-        if username is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Could not validate credentials",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+        # Missing exp/sub claims are rejected by PyJWT itself
+        payload = jwt.decode(
+            token,
+            SECRET_KEY,
+            algorithms=["HS256"],
+            options={"require": ["exp", "sub"], "verify_exp": True},
+        )
+        username: str = payload["sub"]
+        with token_cache_lock:
+            token_cache[key] = (username, payload["exp"])
         return username
     except jwt.PyJWTError:
         raise HTTPException(
@@ -133,10 +256,168 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
         )
 
 def hash_password(password: str) -> str:
-    return hashlib.sha256(password.encode()).hexdigest()
+    return pwd_context.hash(password)
 
 def verify_password(password: str, hashed_password: str) -> bool:
-    return hash_password(password) == hashed_password
+    return pwd_context.verify(password, hashed_password)
+
+# Hashed once at startup so the demo password is never compared in plaintext
+DEMO_PASSWORD_HASH = hash_password("health123")
+
+# Model outputs for recently seen readings (cache key -> (prediction, confidence))
+prediction_cache = LRUCache(maxsize=4096)
+
+def numeric_buffer(request: PredictionRequest) -> np.ndarray:
+    """Numeric readings in NUM_COLS order as a float32 vector"""
+    return np.fromiter(numeric_features(request), dtype=NUM_DTYPE, count=len(NUM_COLS))
+
+def prediction_cache_key(request: PredictionRequest, numeric: np.ndarray) -> tuple:
+    """Categorical features plus readings quantized to sensor resolution"""
+    return (request.Location, request.Source_Type, numeric.round(3).tobytes())
+
+# Prediction batching: concurrent /predict calls share one model invocation
+BATCH_TIMEOUT_MS = float(os.environ.get('BATCH_TIMEOUT_MS', '5'))
+prediction_queue: Optional[asyncio.Queue] = None
+batch_worker_task: Optional[asyncio.Task] = None
+
+async def batch_worker():
+    """Collect queued rows for up to BATCH_TIMEOUT_MS and score them together"""
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await prediction_queue.get()]
+        deadline = loop.time() + BATCH_TIMEOUT_MS / 1000
+        while len(batch) < MAX_BATCH_SIZE:
+            try:
+                batch.append(prediction_queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(prediction_queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        rows = [row for row, _ in batch]
+        try:
+            probas = model.predict(
+                rows,
+                prediction_type='Probability',
+                thread_count=1,
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            continue
+        for (_, future), proba in zip(batch, probas):
+            if not future.done():
+                future.set_result(proba)
+
+async def predict_proba(row) -> np.ndarray:
+    """Queue a feature row for the batch worker and wait for its class probabilities"""
+    future = asyncio.get_running_loop().create_future()
+    await prediction_queue.put((row, future))
+    return await future
+
+# Write coalescing: records are buffered per collection and stored with insert_many
+FLUSH_INTERVAL_S = 0.05
+FLUSH_MAX_RECORDS = 256
+# A failed batch is retried this many times; the buffer never holds more than
+# PENDING_MAX_RECORDS per collection, dropping the oldest records past that
+FLUSH_MAX_RETRIES = 3
+PENDING_MAX_RECORDS = 10_000
+# Longest shutdown waits to store what is still buffered
+SHUTDOWN_FLUSH_TIMEOUT_S = 10
+DUPLICATE_KEY = 11000
+pending_writes: Dict[str, List[dict]] = {"predictions": [], "notifications": []}
+flush_failures: Dict[str, int] = {name: 0 for name in pending_writes}
+dropped_writes: Dict[str, int] = {name: 0 for name in pending_writes}
+flush_requested: Optional[asyncio.Event] = None
+write_flusher_task: Optional[asyncio.Task] = None
+writes_closed = False
+
+def queue_write(collection: str, record: dict):
+    pending = pending_writes[collection]
+    if len(pending) >= PENDING_MAX_RECORDS:
+        # Mongo is not keeping up; counted and logged by the next flush
+        del pending[0]
+        dropped_writes[collection] += 1
+    pending.append(record)
+    if len(pending) >= FLUSH_MAX_RECORDS and flush_requested is not None:
+        flush_requested.set()
+
+def requeue_writes(name: str, batch: List[dict], error: Exception):
+    """Put a failed batch back in front of newer records, up to FLUSH_MAX_RETRIES times"""
+    failures = flush_failures[name] + 1
+    if failures > FLUSH_MAX_RETRIES:
+        flush_failures[name] = 0
+        logger.error(
+            f"Write flush error ({name}): dropping {len(batch)} records "
+            f"after {FLUSH_MAX_RETRIES} retries: {error}"
+        )
+        return
+    flush_failures[name] = failures
+    pending = batch + pending_writes[name]
+    overflow = len(pending) - PENDING_MAX_RECORDS
+    if overflow > 0:
+        del pending[:overflow]
+        dropped_writes[name] += overflow
+    pending_writes[name] = pending
+    logger.warning(f"Write flush error ({name}, {len(batch)} records, attempt {failures}): {error}")
+
+async def flush_collection(name: str):
+    if dropped_writes[name]:
+        logger.error(f"Write buffer full ({name}): dropped {dropped_writes[name]} oldest records")
+        dropped_writes[name] = 0
+    batch = pending_writes[name]
+    if not batch:
+        return
+    # Swap the buffer out before awaiting so new records go to a fresh list
+    pending_writes[name] = []
+    try:
+        await db[name].insert_many(batch, ordered=False)
+    except asyncio.CancelledError:
+        # Shutdown gave up waiting; keep the batch so it is counted as dropped
+        pending_writes[name] = batch + pending_writes[name]
+        raise
+    except BulkWriteError as e:
+        # Unordered: everything not listed was stored, and duplicate keys are
+        # records a previous attempt already stored
+        failed = [
+            batch[err["index"]] for err in e.details.get("writeErrors", [])
+            if err.get("code") != DUPLICATE_KEY
+        ]
+        if failed:
+            requeue_writes(name, failed, e)
+        else:
+            flush_failures[name] = 0
+    except Exception as e:
+        requeue_writes(name, batch, e)
+    else:
+        flush_failures[name] = 0
+
+async def flush_writes():
+    await asyncio.gather(*(flush_collection(name) for name in pending_writes))
+
+async def drain_writes():
+    """Let the flusher finish its current flush, then store whatever is left"""
+    if write_flusher_task is not None:
+        flush_requested.set()
+        await write_flusher_task
+    await flush_writes()
+
+async def write_flusher():
+    """Flush buffered records every FLUSH_INTERVAL_S, or sooner once a buffer fills"""
+    while not writes_closed:
+        try:
+            await asyncio.wait_for(flush_requested.wait(), FLUSH_INTERVAL_S)
+        except asyncio.TimeoutError:
+            pass
+        flush_requested.clear()
+        await flush_writes()
 
 # Routes
 @api_router.get("/")
@@ -147,7 +428,8 @@ async def root():
 async def login(request: LoginRequest):
     # Simple authentication - in production, use proper user database
     # For demo purposes, accepting any username with password "health123"
-    if request.password == "health123":
+    # The KDF is deliberately slow; keep it off the event loop
+    if await run_in_threadpool(verify_password, request.password, DEMO_PASSWORD_HASH):
         access_token_expires = timedelta(hours=24)
         access_token = create_access_token(
             data={"sub": request.username}, expires_delta=access_token_expires
@@ -162,83 +444,77 @@ async def login(request: LoginRequest):
             detail="Invalid credentials"
         )
 
+@lru_cache(maxsize=1024)
+def mock_predict(pH: float, Turbidity: float, O2: float, NH4: float) -> Tuple[int, float]:
+    """Rule-based stand-in used while the CatBoost model is unavailable"""
+    # High risk if pH is very low/high, high turbidity, or low oxygen
+    # (booleans summed as ints; the pH bounds are mutually exclusive)
+    risk_factors = (pH < 6.5) + (pH > 8.5) + (Turbidity > 10) + (O2 < 5) + (NH4 > 2)
+
+    high_risk = risk_factors >= 2
+    return int(high_risk), 0.85 if high_risk else 0.75
+
+def build_prediction_response(prediction: int, confidence: float) -> PredictionResponse:
+    # Determine risk level and message
+    if prediction == 1:
+        risk_level = "HIGH"
+        message = "⚠️ High Risk of Water-Borne Outbreak detected in this area. Stay cautious!"
+    else:
+        risk_level = "LOW"
+        message = "✅ Water quality parameters appear normal. Low outbreak risk detected."
+
+    return PredictionResponse(
+        prediction=prediction,
+        confidence=confidence,
+        risk_level=risk_level,
+        message=message
+    )
+
+async def score_reading(request: PredictionRequest, username: str) -> PredictionResponse:
+    """Predict outbreak risk for one reading and queue its prediction record"""
+    if model is None:
+        # Degraded mode: answer from the rules and skip the database entirely
+        prediction, confidence = mock_predict(request.pH, request.Turbidity, request.O2, request.NH4)
+        return build_prediction_response(prediction, confidence)
+
+    numeric = numeric_buffer(request)
+    cache_key = prediction_cache_key(request, numeric)
+    cached = prediction_cache.get(cache_key)
+    if cached is not None:
+        # Repeated sensor reading; reuse the model output
+        prediction, confidence = cached
+    else:
+        # Row in model feature order, numeric values already at model precision
+        row = (request.Location, request.Source_Type, *numeric.tolist())
+        
+        # Scored together with any other rows queued in the same window
+        proba = await predict_proba(row)
+        prediction = int(proba.argmax())
+        confidence = float(proba.max())
+        prediction_cache[cache_key] = (prediction, confidence)
+    
+    response = build_prediction_response(prediction, confidence)
+    
+    # Store prediction in database with the next buffered flush
+    prediction_record = {
+        "id": uuid7(),
+        "username": username,
+        "location": request.Location,
+        "source_type": request.Source_Type,
+        "prediction": prediction,
+        "confidence": confidence,
+        "risk_level": response.risk_level,
+        "timestamp": datetime.utcnow(),
+        "water_parameters": request.model_dump()
+    }
+    queue_write("predictions", prediction_record)
+    
+    return response
+
 @api_router.post("/predict", response_model=PredictionResponse)
 async def predict_outbreak(request: PredictionRequest, username: str = Depends(verify_token)):
     try:
-        # Prepare data for prediction
-        data = {
-            'Location': request.Location,
-            'Source_Type': request.Source_Type,
-            'NH4': request.NH4,
-            'BSK5': request.BSK5,
-            'Suspended': request.Suspended,
-            'O2': request.O2,
-            'NO3': request.NO3,
-            'NO2': request.NO2,
-            'SO4': request.SO4,
-            'PO4': request.PO4,
-            'CL': request.CL,
-            'pH': request.pH,
-            'Turbidity': request.Turbidity,
-            'Temperature': request.Temperature,
-            'Year': request.Year,
-            'Month': request.Month,
-            'Day': request.Day
-        }
-        
-        if model is not None:
-            # Create DataFrame for prediction
-            df = pd.DataFrame([data])
-            
-            # Make prediction
-            prediction = model.predict(df)[0]
-            prediction_proba = model.predict_proba(df)[0]
-            confidence = float(max(prediction_proba))
-        else:
-            # Mock prediction based on some simple rules for demonstration
-            # High risk if pH is very low/high, high turbidity, or low oxygen
-            risk_factors = 0
-            if request.pH < 6.5 or request.pH > 8.5:
-                risk_factors += 1
-            if request.Turbidity > 10:
-                risk_factors += 1
-            if request.O2 < 5:
-                risk_factors += 1
-            if request.NH4 > 2:
-                risk_factors += 1
-                
-            prediction = 1 if risk_factors >= 2 else 0
-            confidence = 0.85 if risk_factors >= 2 else 0.75
-        
-        # Determine risk level and message
-        if prediction == 1:
-            risk_level = "HIGH"
-            message = "⚠️ High Risk of Water-Borne Outbreak detected in this area. Stay cautious!"
-        else:
-            risk_level = "LOW"
-            message = "✅ Water quality parameters appear normal. Low outbreak risk detected."
-        
-        # Store prediction in database
-        prediction_record = {
-            "id": str(uuid.uuid4()),
-            "username": username,
-            "location": request.Location,
-            "source_type": request.Source_Type,
-            "prediction": int(prediction),
-            "confidence": confidence,
-            "risk_level": risk_level,
-            "timestamp": datetime.utcnow(),
-            "water_parameters": data
-        }
-        await db.predictions.insert_one(prediction_record)
-        
-        return PredictionResponse(
-            prediction=int(prediction),
-            confidence=confidence,
-            risk_level=risk_level,
-            message=message
-        )
-        
+        return await score_reading(request, username)
     except Exception as e:
         logger.error(f"Prediction error: {e}")
         raise HTTPException(
@@ -246,20 +522,35 @@ async def predict_outbreak(request: PredictionRequest, username: str = Depends(v
             detail=f"Prediction failed: {str(e)}"
         )
 
+@api_router.post("/predict/batch", response_model=BatchPredictionResponse)
+async def predict_outbreak_batch(request: BatchPredictionRequest, username: str = Depends(verify_token)):
+    """Score several readings in one request; rows share a single model call"""
+    try:
+        results = await asyncio.gather(
+            *(score_reading(row, username) for row in request.rows)
+        )
+        return BatchPredictionResponse(results=results)
+    except Exception as e:
+        logger.error(f"Batch prediction error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Prediction failed: {str(e)}"
+        )
+
 @api_router.post("/notify")
 async def trigger_notification(request: NotificationRequest, username: str = Depends(verify_token)):
     """Endpoint to trigger notifications for high-risk areas"""
     try:
-        # Store notification record
+        # Store notification record with the next buffered flush
         notification_record = {
-            "id": str(uuid.uuid4()),
+            "id": uuid7(),
             "location": request.location,
             "risk_level": request.risk_level,
             "message": request.message,
             "triggered_by": username,
             "timestamp": datetime.utcnow()
         }
-        await db.notifications.insert_one(notification_record)
+        queue_write("notifications", notification_record)
         
         return {
             "status": "success",
@@ -279,10 +570,11 @@ async def get_prediction_history(username: str = Depends(verify_token)):
     try:
         predictions = await db.predictions.find(
             {"username": username},
-            {"_id": 0}  # Exclude the MongoDB _id field
-        ).sort("timestamp", -1).limit(50).to_list(50)
+            projection={"_id": 0, "water_parameters": 0}  # Summary fields only
+        ).sort("timestamp", -1).limit(50).to_list(length=50)
         
-        return {"predictions": predictions}
+        # orjson handles the stored datetimes directly, no jsonable_encoder pass
+        return ORJSONResponse({"predictions": predictions})
     except Exception as e:
         logger.error(f"History fetch error: {e}")
         raise HTTPException(
@@ -293,34 +585,127 @@ async def get_prediction_history(username: str = Depends(verify_token)):
 # Legacy endpoints
 @api_router.post("/status", response_model=StatusCheck)
 async def create_status_check(input: StatusCheckCreate):
-    status_dict = input.dict()
+    status_dict = input.model_dump()
     status_obj = StatusCheck(**status_dict)
-    _ = await db.status_checks.insert_one(status_obj.dict())
+    _ = await db.status_checks.insert_one(status_obj.model_dump())
     return status_obj
 
 @api_router.get("/status", response_model=List[StatusCheck])
 async def get_status_checks():
-    status_checks = await db.status_checks.find().to_list(1000)
+    status_checks = await db.status_checks.find({}, {"_id": 0}).to_list(1000)
     return [StatusCheck(**status_check) for status_check in status_checks]
 
 # Include the router in the main app
 app.include_router(api_router)
 
+class AllowAllCORSMiddleware(CORSMiddleware):
+    """CORSMiddleware with a fast path for the allow-all-origins policy
+
+    Cross-origin requests without cookies always get the same simple headers,
+    so those are encoded once and appended as-is. Preflights and cookie-bearing
+    requests, which must echo the origin back, use the stock implementation.
+    """
+
+    def __init__(self, app, **kwargs):
+        super().__init__(app, **kwargs)
+        self.raw_simple_headers = [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in self.simple_headers.items()
+        ]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not self.allow_all_origins or scope["type"] != "http":
+            await super().__call__(scope, receive, send)
+            return
+
+        has_origin = has_cookie = False
+        for name, _ in scope["headers"]:
+            if name == b"origin":
+                has_origin = True
+            elif name == b"cookie":
+                has_cookie = True
+
+        if not has_origin:
+            await self.app(scope, receive, send)
+            return
+        if has_cookie or scope["method"] == "OPTIONS":
+            await super().__call__(scope, receive, send)
+            return
+
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), *self.raw_simple_headers]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
+
 app.add_middleware(
-    CORSMiddleware,
+    AllowAllCORSMiddleware,
     allow_credentials=True,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+# Configure logging: request handlers only enqueue records, a listener thread writes them
+log_queue = queue.SimpleQueue()
+log_stream_handler = logging.StreamHandler()
+log_stream_handler.setFormatter(
+    logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 )
+log_listener = logging.handlers.QueueListener(log_queue, log_stream_handler)
+root_logger = logging.getLogger()
+root_logger.setLevel(logging.INFO)
+root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def start_log_listener():
+    log_listener.start()
+
+index_task: Optional[asyncio.Task] = None
+
+async def create_indexes():
+    # Serves the history query's filter and sort in one index walk
+    try:
+        await db.predictions.create_index([("username", 1), ("timestamp", -1)])
+    except Exception as e:
+        logger.error(f"Index creation error: {e}")
+
+@app.on_event("startup")
+async def start_index_creation():
+    # In the background, so an unreachable Mongo never delays serving
+    global index_task
+    index_task = asyncio.create_task(create_indexes())
+
+@app.on_event("startup")
+async def start_batch_worker():
+    global prediction_queue, batch_worker_task
+    if model is not None:
+        prediction_queue = asyncio.Queue()
+        batch_worker_task = asyncio.create_task(batch_worker())
+    else:
+        logger.warning("Running degraded: serving mock predictions, which are not stored")
+
+@app.on_event("startup")
+async def start_write_flusher():
+    global flush_requested, write_flusher_task, writes_closed
+    writes_closed = False
+    flush_requested = asyncio.Event()
+    write_flusher_task = asyncio.create_task(write_flusher())
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    global writes_closed
+    if index_task is not None:
+        index_task.cancel()
+    if batch_worker_task is not None:
+        batch_worker_task.cancel()
+    writes_closed = True
+    try:
+        await asyncio.wait_for(drain_writes(), SHUTDOWN_FLUSH_TIMEOUT_S)
+    except asyncio.TimeoutError:
+        lost = sum(len(batch) for batch in pending_writes.values())
+        logger.error(f"Write flush timed out on shutdown: dropping {lost} records")
+    client.close()
+    log_listener.stop()
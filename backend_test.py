@@ -4,23 +4,205 @@ Smart Health Surveillance Backend API Test Suite
 Tests all authentication, prediction, notification, and history endpoints
 """
 
-import requests
+import asyncio
+import base64
+import functools
+import hmac
+import io
 import json
+import os
 import sys
-from datetime import datetime
 import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+
+import httpx
+
+try:
+    import orjson
+except ImportError:  # The stdlib encoder is slower but produces the same lines
+    orjson = None
 
 # Configuration
 BASE_URL = "https://h2oguard.preview.emergentagent.com/api"
 VALID_PASSWORD = "health123"
 INVALID_PASSWORD = "wrongpassword"
 TEST_USERNAME = "testuser_health"
+MAX_RATE_LIMIT_RETRIES = 3
+# Gateway errors and dropped connections are retried with exponential backoff
+RETRY_STATUSES = frozenset({502, 503, 504})
+MAX_TRANSIENT_RETRIES = 3
+RETRY_BACKOFF_FACTOR = 0.2
+# Failures a test reports instead of raising: transport errors and undecodable bodies
+REQUEST_ERRORS = (httpx.HTTPError, ValueError)
+RESULTS_PATH = "/app/test_results_detailed.jsonl"
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Login tokens are reused across runs while still valid
+TOKEN_CACHE_PATH = Path.home() / ".cache" / "mysih_test_token.json"
+TOKEN_CACHE_SECRET = os.environ.get("TOKEN_CACHE_SECRET", "mysih-backend-tests").encode()
+
+# Good water quality parameters
+GOOD_WATER_PAYLOAD = {
+    "Location": "Urban_Area",
+    "Source_Type": "Treated_Water",
+    "NH4": 0.5,
+    "BSK5": 2.0,
+    "Suspended": 5.0,
+    "O2": 8.5,
+    "NO3": 1.0,
+    "NO2": 0.1,
+    "SO4": 25.0,
+    "PO4": 0.2,
+    "CL": 15.0,
+    "pH": 7.2,
+    "Turbidity": 2.0,
+    "Temperature": 22.0,
+    "Year": 2024,
+    "Month": 12,
+    "Day": 15
+}
+
+# Poor water quality parameters that should trigger high risk
+POOR_WATER_PAYLOAD = {
+    "Location": "Rural_Area",
+    "Source_Type": "Untreated_Water",
+    "NH4": 5.0,  # High ammonia
+    "BSK5": 15.0,  # High BOD
+    "Suspended": 50.0,  # High suspended solids
+    "O2": 2.0,  # Low oxygen
+    "NO3": 10.0,
+    "NO2": 2.0,
+    "SO4": 100.0,
+    "PO4": 5.0,
+    "CL": 50.0,
+    "pH": 5.5,  # Very acidic
+    "Turbidity": 25.0,  # High turbidity
+    "Temperature": 30.0,
+    "Year": 2024,
+    "Month": 12,
+    "Day": 15
+}
+
+# Valid reading sent without a token
+NOAUTH_PAYLOAD = {
+    "Location": "Test_Area",
+    "Source_Type": "Treated_Water",
+    "NH4": 1.0, "BSK5": 3.0, "Suspended": 10.0, "O2": 7.0,
+    "NO3": 2.0, "NO2": 0.5, "SO4": 30.0, "PO4": 1.0,
+    "CL": 20.0, "pH": 7.0, "Turbidity": 5.0, "Temperature": 25.0,
+    "Year": 2024, "Month": 12, "Day": 15
+}
+
+# Missing several required parameters
+MISSING_PAYLOAD = {
+    "Location": "Test_Area",
+    "Source_Type": "Treated_Water",
+    "NH4": 1.0,
+    "pH": 7.0
+    # Missing most required parameters
+}
+
+NOTIFY_PAYLOAD = {
+    "location": "Test_Location",
+    "risk_level": "HIGH",
+    "message": "Test outbreak notification for high-risk area"
+}
+
+def encode_json(payload):
+    """Request body as bytes, ready to send without another encoding pass"""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+def decode_json(body):
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+def json_line(result):
+    """One compact JSON document terminated by a newline"""
+    if orjson is not None:
+        return orjson.dumps(result, option=orjson.OPT_APPEND_NEWLINE).decode()
+    return json.dumps(result, separators=(",", ":"), ensure_ascii=False) + "\n"
+
+# Request bodies never change, so they are serialized once
+_LOGIN_BYTES = encode_json({"username": TEST_USERNAME, "password": VALID_PASSWORD})
+_INVALID_LOGIN_BYTES = encode_json({"username": TEST_USERNAME, "password": INVALID_PASSWORD})
+_WATER_QUALITY_BATCH_BYTES = encode_json({"rows": [GOOD_WATER_PAYLOAD, POOR_WATER_PAYLOAD]})
+_NOAUTH_BYTES = encode_json(NOAUTH_PAYLOAD)
+_MISSING_BYTES = encode_json(MISSING_PAYLOAD)
+_NOTIFY_BYTES = encode_json(NOTIFY_PAYLOAD)
+
+def token_cache_key():
+    """HMAC of the test credentials, so the raw password never lands on disk"""
+    credentials = f"{TEST_USERNAME}:{VALID_PASSWORD}".encode()
+    return hmac.new(TOKEN_CACHE_SECRET, credentials, "sha1").hexdigest()
+
+def token_expiry(token):
+    """exp claim of a JWT, read without verifying; only the server can verify it"""
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"])
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        return 0.0
+
+def load_cached_token():
+    """Token from a previous run, if it was issued for these credentials and is still valid"""
+    try:
+        cached = json.loads(TOKEN_CACHE_PATH.read_text())
+    except (OSError, ValueError):
+        return None
+    token = cached.get("token")
+    if cached.get("key") != token_cache_key() or token_expiry(token) <= time.time() + 30:
+        return None
+    return token
+
+def save_cached_token(token):
+    try:
+        TOKEN_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        # A live bearer token: readable by the owner only
+        fd = os.open(TOKEN_CACHE_PATH, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        os.fchmod(fd, 0o600)  # The mode above only applies to newly created files
+        with os.fdopen(fd, "w") as f:
+            json.dump({"key": token_cache_key(), "token": token}, f)
+    except OSError:
+        pass
+
+def clear_cached_token():
+    try:
+        TOKEN_CACHE_PATH.unlink()
+    except OSError:
+        pass
+
+def _record_errors(test_name):
+    """Log a failed test result instead of raising when the request itself fails"""
+    def decorator(test_func):
+        @functools.wraps(test_func)
+        async def wrapper(self, *args, **kwargs):
+            try:
+                return await test_func(self, *args, **kwargs)
+            except REQUEST_ERRORS as e:
+                self.log_test(test_name, False, f"Request failed: {e}", {"error": str(e)})
+                return False
+        return wrapper
+    return decorator
 
 class HealthSurveillanceAPITester:
     def __init__(self):
         self.base_url = BASE_URL
         self.access_token = None
+        self.auth_headers = dict(JSON_HEADERS)
+        self.token_from_cache = False
+        self.relogin = None
+        self.water_quality_batch = None
         self.test_results = []
+        # Results file, open only while run_all_tests runs
+        self._log_fp = None
+        # Console output is collected here and written in one go after the run
+        self._out = io.StringIO()
         
     def log_test(self, test_name, success, message, details=None):
         """Log test results"""
@@ -28,506 +210,386 @@ class HealthSurveillanceAPITester:
             "test": test_name,
             "success": success,
             "message": message,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp_ns": time.time_ns(),
             "details": details
         }
+        if not success:
+            # Readable time only where someone will look at it
+            result["timestamp"] = datetime.fromtimestamp(
+                result["timestamp_ns"] / 1e9, tz=timezone.utc
+            ).isoformat()
         self.test_results.append(result)
+        if self._log_fp is not None:
+            self._log_fp.write(json_line(result))
         status = "✅ PASS" if success else "❌ FAIL"
-        print(f"{status}: {test_name} - {message}")
+        print(f"{status}: {test_name} - {message}", file=self._out)
         if details and not success:
-            print(f"   Details: {details}")
+            print(f"   Details: {details}", file=self._out)
     
-    def test_authentication_valid(self):
-        """Test login with valid credentials"""
+    async def request(self, client, method, url, **kwargs):
+        """Send a request, pausing only when the server answers 429 Too Many Requests
+
+        Connection failures and 502/503/504 responses are retried with
+        exponential backoff. If a token reused from the cache is rejected
+        with 401, the cache is cleared and the request is retried once after
+        a fresh login.
+        """
+        rate_limited = 0
+        transient = 0
+        relogged = False
+        while True:
+            try:
+                response = await client.request(method, url, **kwargs)
+            except httpx.TransportError:
+                if transient >= MAX_TRANSIENT_RETRIES:
+                    raise
+                transient += 1
+                await asyncio.sleep(RETRY_BACKOFF_FACTOR * 2 ** (transient - 1))
+                continue
+            if response.status_code in RETRY_STATUSES and transient < MAX_TRANSIENT_RETRIES:
+                transient += 1
+                await asyncio.sleep(RETRY_BACKOFF_FACTOR * 2 ** (transient - 1))
+                continue
+            if (response.status_code == 401 and self.token_from_cache and not relogged
+                    and kwargs.get("headers") is self.auth_headers):
+                relogged = True
+                await self.refresh_login(client)
+                continue
+            if response.status_code == 429 and rate_limited < MAX_RATE_LIMIT_RETRIES:
+                rate_limited += 1
+                await asyncio.sleep(self.retry_after(response))
+                continue
+            return response
+    
+    @staticmethod
+    def retry_after(response, default=1.0):
+        """Seconds to wait per the Retry-After header (delta-seconds or HTTP-date)"""
+        value = response.headers.get("Retry-After")
+        if value is None:
+            return default
         try:
-            url = f"{self.base_url}/auth/login"
-            payload = {
-                "username": TEST_USERNAME,
-                "password": VALID_PASSWORD
-            }
-            
-            response = requests.post(url, json=payload, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if "access_token" in data and "token_type" in data:
-                    self.access_token = data["access_token"]
-                    self.log_test(
-                        "Authentication - Valid Login",
-                        True,
-                        f"Login successful for user {TEST_USERNAME}",
-                        {"token_received": True, "message": data.get("message", "")}
-                    )
-                    return True
-                else:
-                    self.log_test(
-                        "Authentication - Valid Login",
-                        False,
-                        "Response missing required fields",
-                        {"response": data}
-                    )
-            else:
-                self.log_test(
-                    "Authentication - Valid Login",
-                    False,
-                    f"HTTP {response.status_code}: {response.text}",
-                    {"status_code": response.status_code}
-                )
-        except Exception as e:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            delay = parsedate_to_datetime(value) - datetime.now(timezone.utc)
+            return max(delay.total_seconds(), 0.0)
+        except (TypeError, ValueError):
+            return default
+    
+    def set_access_token(self, token):
+        self.access_token = token
+        # Updated in place so requests already holding the dict pick up a new token
+        self.auth_headers["Authorization"] = f"Bearer {token}"
+    
+    async def login(self, client):
+        """Log in with the test credentials, keeping and caching the token on success"""
+        url = "/auth/login"
+        response = await self.request(client, "POST", url, content=_LOGIN_BYTES, headers=JSON_HEADERS)
+        if response.status_code == 200:
+            data = decode_json(response.content)
+            if "access_token" in data:
+                self.set_access_token(data["access_token"])
+                save_cached_token(data["access_token"])
+        return response
+    
+    async def refresh_login(self, client):
+        """Replace a rejected cached token; concurrent callers share one login"""
+        if self.relogin is None:
+            clear_cached_token()
+            self.relogin = asyncio.ensure_future(self.login(client))
+        await self.relogin
+    
+    async def _predict_batch(self, client, body):
+        """POST several readings to /predict/batch in a single round-trip"""
+        url = "/predict/batch"
+        return await self.request(client, "POST", url, content=body, headers=self.auth_headers)
+    
+    def predict_water_quality_batch(self, client):
+        """One shared batch call for the good and poor water quality tests"""
+        if self.water_quality_batch is None:
+            self.water_quality_batch = asyncio.ensure_future(
+                self._predict_batch(client, _WATER_QUALITY_BATCH_BYTES)
+            )
+        return self.water_quality_batch
+    
+    def _expect(self, response, status_code, test_name):
+        """Decoded body if the response has the expected status, else log the failure and return None"""
+        if response.status_code == status_code:
+            return decode_json(response.content) if response.content else {}
+        if status_code == 200:
             self.log_test(
-                "Authentication - Valid Login",
+                test_name,
                 False,
-                f"Request failed: {str(e)}",
-                {"error": str(e)}
+                f"HTTP {response.status_code}: {response.text}",
+                {"status_code": response.status_code}
             )
-        return False
-    
-    def test_authentication_invalid(self):
-        """Test login with invalid credentials"""
-        try:
-            url = f"{self.base_url}/auth/login"
-            payload = {
-                "username": TEST_USERNAME,
-                "password": INVALID_PASSWORD
-            }
-            
-            response = requests.post(url, json=payload, timeout=10)
-            
-            if response.status_code == 401:
-                self.log_test(
-                    "Authentication - Invalid Login",
-                    True,
-                    "Correctly rejected invalid credentials",
-                    {"status_code": response.status_code}
-                )
-                return True
-            else:
-                self.log_test(
-                    "Authentication - Invalid Login",
-                    False,
-                    f"Expected 401, got {response.status_code}",
-                    {"response": response.text}
-                )
-        except Exception as e:
+        else:
             self.log_test(
-                "Authentication - Invalid Login",
+                test_name,
                 False,
-                f"Request failed: {str(e)}",
-                {"error": str(e)}
+                f"Expected {status_code}, got {response.status_code}",
+                {"response": response.text}
             )
-        return False
+        return None
     
-    def test_prediction_good_water_quality(self):
-        """Test prediction with good water quality parameters"""
-        if not self.access_token:
+    async def test_authentication_valid(self, client):
+        """Test login with valid credentials"""
+        cached_token = load_cached_token()
+        if cached_token:
+            self.set_access_token(cached_token)
+            self.token_from_cache = True
             self.log_test(
-                "Prediction - Good Water Quality",
-                False,
-                "No access token available",
-                {"requires_auth": True}
+                "Authentication - Valid Login",
+                True,
+                f"Reusing cached login token for user {TEST_USERNAME}",
+                {"token_received": True, "cached": True}
             )
+            return True
+        
+        return await self._login_and_check(client)
+    
+    @_record_errors("Authentication - Valid Login")
+    async def _login_and_check(self, client):
+        response = await self.login(client)
+        data = self._expect(response, 200, "Authentication - Valid Login")
+        if data is None:
             return False
-            
-        try:
-            url = f"{self.base_url}/predict"
-            headers = {"Authorization": f"Bearer {self.access_token}"}
-            
-            # Good water quality parameters
-            payload = {
-                "Location": "Urban_Area",
-                "Source_Type": "Treated_Water",
-                "NH4": 0.5,
-                "BSK5": 2.0,
-                "Suspended": 5.0,
-                "O2": 8.5,
-                "NO3": 1.0,
-                "NO2": 0.1,
-                "SO4": 25.0,
-                "PO4": 0.2,
-                "CL": 15.0,
-                "pH": 7.2,
-                "Turbidity": 2.0,
-                "Temperature": 22.0,
-                "Year": 2024,
-                "Month": 12,
-                "Day": 15
-            }
-            
-            response = requests.post(url, json=payload, headers=headers, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                required_fields = ["prediction", "risk_level", "message"]
-                
-                if all(field in data for field in required_fields):
-                    self.log_test(
-                        "Prediction - Good Water Quality",
-                        True,
-                        f"Prediction successful: {data['risk_level']} risk",
-                        {
-                            "prediction": data["prediction"],
-                            "risk_level": data["risk_level"],
-                            "confidence": data.get("confidence"),
-                            "message": data["message"]
-                        }
-                    )
-                    return True
-                else:
-                    self.log_test(
-                        "Prediction - Good Water Quality",
-                        False,
-                        "Response missing required fields",
-                        {"response": data, "required": required_fields}
-                    )
-            else:
-                self.log_test(
-                    "Prediction - Good Water Quality",
-                    False,
-                    f"HTTP {response.status_code}: {response.text}",
-                    {"status_code": response.status_code}
-                )
-        except Exception as e:
+        
+        if "access_token" in data and "token_type" in data:
             self.log_test(
-                "Prediction - Good Water Quality",
-                False,
-                f"Request failed: {str(e)}",
-                {"error": str(e)}
+                "Authentication - Valid Login",
+                True,
+                f"Login successful for user {TEST_USERNAME}",
+                {"token_received": True, "message": data.get("message", "")}
             )
+            return True
+        self.log_test(
+            "Authentication - Valid Login",
+            False,
+            "Response missing required fields",
+            {"response": data}
+        )
         return False
     
-    def test_prediction_poor_water_quality(self):
-        """Test prediction with poor water quality parameters (should trigger high risk)"""
-        if not self.access_token:
+    @_record_errors("Authentication - Invalid Login")
+    async def test_authentication_invalid(self, client):
+        """Test login with invalid credentials"""
+        response = await self.request(client, "POST", "/auth/login", content=_INVALID_LOGIN_BYTES, headers=JSON_HEADERS)
+        if self._expect(response, 401, "Authentication - Invalid Login") is None:
+            return False
+        
+        self.log_test(
+            "Authentication - Invalid Login",
+            True,
+            "Correctly rejected invalid credentials",
+            {"status_code": response.status_code}
+        )
+        return True
+    
+    @_record_errors("Prediction - Good Water Quality")
+    async def test_prediction_good_water_quality(self, client):
+        """Test prediction with good water quality parameters"""
+        # Shares one /predict/batch round-trip with the other water quality test
+        response = await self.predict_water_quality_batch(client)
+        batch = self._expect(response, 200, "Prediction - Good Water Quality")
+        if batch is None:
+            return False
+        
+        results = batch.get("results", [])
+        data = results[0] if len(results) > 0 else {}
+        required_fields = ["prediction", "risk_level", "message"]
+        
+        if all(field in data for field in required_fields):
             self.log_test(
-                "Prediction - Poor Water Quality",
-                False,
-                "No access token available",
-                {"requires_auth": True}
+                "Prediction - Good Water Quality",
+                True,
+                f"Prediction successful: {data['risk_level']} risk",
+                {
+                    "prediction": data["prediction"],
+                    "risk_level": data["risk_level"],
+                    "confidence": data.get("confidence"),
+                    "message": data["message"]
+                }
             )
+            return True
+        self.log_test(
+            "Prediction - Good Water Quality",
+            False,
+            "Response missing required fields",
+            {"response": data, "required": required_fields}
+        )
+        return False
+    
+    @_record_errors("Prediction - Poor Water Quality")
+    async def test_prediction_poor_water_quality(self, client):
+        """Test prediction with poor water quality parameters (should trigger high risk)"""
+        # Shares one /predict/batch round-trip with the other water quality test
+        response = await self.predict_water_quality_batch(client)
+        batch = self._expect(response, 200, "Prediction - Poor Water Quality")
+        if batch is None:
             return False
-            
-        try:
-            url = f"{self.base_url}/predict"
-            headers = {"Authorization": f"Bearer {self.access_token}"}
-            
-            # Poor water quality parameters that should trigger high risk
-            payload = {
-                "Location": "Rural_Area",
-                "Source_Type": "Untreated_Water",
-                "NH4": 5.0,  # High ammonia
-                "BSK5": 15.0,  # High BOD
-                "Suspended": 50.0,  # High suspended solids
-                "O2": 2.0,  # Low oxygen
-                "NO3": 10.0,
-                "NO2": 2.0,
-                "SO4": 100.0,
-                "PO4": 5.0,
-                "CL": 50.0,
-                "pH": 5.5,  # Very acidic
-                "Turbidity": 25.0,  # High turbidity
-                "Temperature": 30.0,
-                "Year": 2024,
-                "Month": 12,
-                "Day": 15
-            }
-            
-            response = requests.post(url, json=payload, headers=headers, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                required_fields = ["prediction", "risk_level", "message"]
-                
-                if all(field in data for field in required_fields):
-                    # Check if high risk was detected
-                    is_high_risk = data["risk_level"] == "HIGH" or data["prediction"] == 1
-                    self.log_test(
-                        "Prediction - Poor Water Quality",
-                        True,
-                        f"Prediction successful: {data['risk_level']} risk detected",
-                        {
-                            "prediction": data["prediction"],
-                            "risk_level": data["risk_level"],
-                            "confidence": data.get("confidence"),
-                            "high_risk_detected": is_high_risk,
-                            "message": data["message"]
-                        }
-                    )
-                    return True
-                else:
-                    self.log_test(
-                        "Prediction - Poor Water Quality",
-                        False,
-                        "Response missing required fields",
-                        {"response": data, "required": required_fields}
-                    )
-            else:
-                self.log_test(
-                    "Prediction - Poor Water Quality",
-                    False,
-                    f"HTTP {response.status_code}: {response.text}",
-                    {"status_code": response.status_code}
-                )
-        except Exception as e:
+        
+        results = batch.get("results", [])
+        data = results[1] if len(results) > 1 else {}
+        required_fields = ["prediction", "risk_level", "message"]
+        
+        if all(field in data for field in required_fields):
+            # Check if high risk was detected
+            is_high_risk = data["risk_level"] == "HIGH" or data["prediction"] == 1
             self.log_test(
                 "Prediction - Poor Water Quality",
-                False,
-                f"Request failed: {str(e)}",
-                {"error": str(e)}
+                True,
+                f"Prediction successful: {data['risk_level']} risk detected",
+                {
+                    "prediction": data["prediction"],
+                    "risk_level": data["risk_level"],
+                    "confidence": data.get("confidence"),
+                    "high_risk_detected": is_high_risk,
+                    "message": data["message"]
+                }
             )
+            return True
+        self.log_test(
+            "Prediction - Poor Water Quality",
+            False,
+            "Response missing required fields",
+            {"response": data, "required": required_fields}
+        )
         return False
     
-    def test_prediction_without_auth(self):
+    @_record_errors("Prediction - No Authentication")
+    async def test_prediction_without_auth(self, client):
         """Test prediction endpoint without authentication"""
-        try:
-            url = f"{self.base_url}/predict"
-            payload = {
-                "Location": "Test_Area",
-                "Source_Type": "Treated_Water",
-                "NH4": 1.0, "BSK5": 3.0, "Suspended": 10.0, "O2": 7.0,
-                "NO3": 2.0, "NO2": 0.5, "SO4": 30.0, "PO4": 1.0,
-                "CL": 20.0, "pH": 7.0, "Turbidity": 5.0, "Temperature": 25.0,
-                "Year": 2024, "Month": 12, "Day": 15
-            }
-            
-            response = requests.post(url, json=payload, timeout=10)
-            
-            if response.status_code == 401:
-                self.log_test(
-                    "Prediction - No Authentication",
-                    True,
-                    "Correctly rejected request without authentication",
-                    {"status_code": response.status_code}
-                )
-                return True
-            else:
-                self.log_test(
-                    "Prediction - No Authentication",
-                    False,
-                    f"Expected 401, got {response.status_code}",
-                    {"response": response.text}
-                )
-        except Exception as e:
-            self.log_test(
-                "Prediction - No Authentication",
-                False,
-                f"Request failed: {str(e)}",
-                {"error": str(e)}
-            )
-        return False
+        response = await self.request(client, "POST", "/predict", content=_NOAUTH_BYTES, headers=JSON_HEADERS)
+        if self._expect(response, 401, "Prediction - No Authentication") is None:
+            return False
+        
+        self.log_test(
+            "Prediction - No Authentication",
+            True,
+            "Correctly rejected request without authentication",
+            {"status_code": response.status_code}
+        )
+        return True
     
-    def test_prediction_missing_parameters(self):
+    @_record_errors("Prediction - Missing Parameters")
+    async def test_prediction_missing_parameters(self, client):
         """Test prediction with missing required parameters"""
-        if not self.access_token:
-            self.log_test(
-                "Prediction - Missing Parameters",
-                False,
-                "No access token available",
-                {"requires_auth": True}
-            )
+        response = await self.request(client, "POST", "/predict", content=_MISSING_BYTES, headers=self.auth_headers)
+        if self._expect(response, 422, "Prediction - Missing Parameters") is None:  # Validation error
             return False
-            
-        try:
-            url = f"{self.base_url}/predict"
-            headers = {"Authorization": f"Bearer {self.access_token}"}
-            
-            # Missing several required parameters
-            payload = {
-                "Location": "Test_Area",
-                "Source_Type": "Treated_Water",
-                "NH4": 1.0,
-                "pH": 7.0
-                # Missing most required parameters
-            }
-            
-            response = requests.post(url, json=payload, headers=headers, timeout=10)
-            
-            if response.status_code == 422:  # Validation error
-                self.log_test(
-                    "Prediction - Missing Parameters",
-                    True,
-                    "Correctly rejected request with missing parameters",
-                    {"status_code": response.status_code}
-                )
-                return True
-            else:
-                self.log_test(
-                    "Prediction - Missing Parameters",
-                    False,
-                    f"Expected 422, got {response.status_code}",
-                    {"response": response.text}
-                )
-        except Exception as e:
-            self.log_test(
-                "Prediction - Missing Parameters",
-                False,
-                f"Request failed: {str(e)}",
-                {"error": str(e)}
-            )
-        return False
+        
+        self.log_test(
+            "Prediction - Missing Parameters",
+            True,
+            "Correctly rejected request with missing parameters",
+            {"status_code": response.status_code}
+        )
+        return True
     
-    def test_notification_trigger(self):
+    @_record_errors("Notification Trigger")
+    async def test_notification_trigger(self, client):
         """Test notification trigger endpoint"""
-        if not self.access_token:
-            self.log_test(
-                "Notification Trigger",
-                False,
-                "No access token available",
-                {"requires_auth": True}
-            )
+        response = await self.request(client, "POST", "/notify", content=_NOTIFY_BYTES, headers=self.auth_headers)
+        data = self._expect(response, 200, "Notification Trigger")
+        if data is None:
             return False
-            
-        try:
-            url = f"{self.base_url}/notify"
-            headers = {"Authorization": f"Bearer {self.access_token}"}
-            
-            payload = {
-                "location": "Test_Location",
-                "risk_level": "HIGH",
-                "message": "Test outbreak notification for high-risk area"
-            }
-            
-            response = requests.post(url, json=payload, headers=headers, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if "status" in data and data["status"] == "success":
-                    self.log_test(
-                        "Notification Trigger",
-                        True,
-                        "Notification triggered successfully",
-                        {
-                            "notification_id": data.get("notification_id"),
-                            "message": data.get("message")
-                        }
-                    )
-                    return True
-                else:
-                    self.log_test(
-                        "Notification Trigger",
-                        False,
-                        "Unexpected response format",
-                        {"response": data}
-                    )
-            else:
-                self.log_test(
-                    "Notification Trigger",
-                    False,
-                    f"HTTP {response.status_code}: {response.text}",
-                    {"status_code": response.status_code}
-                )
-        except Exception as e:
+        
+        if data.get("status") == "success":
             self.log_test(
                 "Notification Trigger",
-                False,
-                f"Request failed: {str(e)}",
-                {"error": str(e)}
+                True,
+                "Notification triggered successfully",
+                {
+                    "notification_id": data.get("notification_id"),
+                    "message": data.get("message")
+                }
             )
+            return True
+        self.log_test(
+            "Notification Trigger",
+            False,
+            "Unexpected response format",
+            {"response": data}
+        )
         return False
     
-    def test_prediction_history(self):
+    @_record_errors("Prediction History")
+    async def test_prediction_history(self, client):
         """Test prediction history endpoint"""
-        if not self.access_token:
-            self.log_test(
-                "Prediction History",
-                False,
-                "No access token available",
-                {"requires_auth": True}
-            )
+        response = await self.request(client, "GET", "/predictions/history", headers=self.auth_headers)
+        data = self._expect(response, 200, "Prediction History")
+        if data is None:
             return False
-            
-        try:
-            url = f"{self.base_url}/predictions/history"
-            headers = {"Authorization": f"Bearer {self.access_token}"}
-            
-            response = requests.get(url, headers=headers, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if "predictions" in data and isinstance(data["predictions"], list):
-                    self.log_test(
-                        "Prediction History",
-                        True,
-                        f"History retrieved successfully ({len(data['predictions'])} records)",
-                        {"record_count": len(data["predictions"])}
-                    )
-                    return True
-                else:
-                    self.log_test(
-                        "Prediction History",
-                        False,
-                        "Unexpected response format",
-                        {"response": data}
-                    )
-            else:
-                self.log_test(
-                    "Prediction History",
-                    False,
-                    f"HTTP {response.status_code}: {response.text}",
-                    {"status_code": response.status_code}
-                )
-        except Exception as e:
+        
+        if "predictions" in data and isinstance(data["predictions"], list):
             self.log_test(
                 "Prediction History",
-                False,
-                f"Request failed: {str(e)}",
-                {"error": str(e)}
+                True,
+                f"History retrieved successfully ({len(data['predictions'])} records)",
+                {"record_count": len(data["predictions"])}
             )
+            return True
+        self.log_test(
+            "Prediction History",
+            False,
+            "Unexpected response format",
+            {"response": data}
+        )
         return False
     
-    def test_api_root(self):
+    @_record_errors("API Root Endpoint")
+    async def test_api_root(self, client):
         """Test API root endpoint"""
-        try:
-            url = f"{self.base_url}/"
-            response = requests.get(url, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if "message" in data and "status" in data:
-                    self.log_test(
-                        "API Root Endpoint",
-                        True,
-                        "API root accessible",
-                        {"response": data}
-                    )
-                    return True
-                else:
-                    self.log_test(
-                        "API Root Endpoint",
-                        False,
-                        "Unexpected response format",
-                        {"response": data}
-                    )
-            else:
-                self.log_test(
-                    "API Root Endpoint",
-                    False,
-                    f"HTTP {response.status_code}: {response.text}",
-                    {"status_code": response.status_code}
-                )
-        except Exception as e:
+        response = await self.request(client, "GET", "/")
+        data = self._expect(response, 200, "API Root Endpoint")
+        if data is None:
+            return False
+        
+        if "message" in data and "status" in data:
             self.log_test(
                 "API Root Endpoint",
-                False,
-                f"Request failed: {str(e)}",
-                {"error": str(e)}
+                True,
+                "API root accessible",
+                {"response": data}
             )
+            return True
+        self.log_test(
+            "API Root Endpoint",
+            False,
+            "Unexpected response format",
+            {"response": data}
+        )
         return False
     
-    def run_all_tests(self):
-        """Run all test scenarios"""
-        print(f"🧪 Starting Smart Health Surveillance API Tests")
-        print(f"🌐 Base URL: {self.base_url}")
-        print(f"👤 Test User: {TEST_USERNAME}")
-        print("=" * 60)
+    async def run_all_tests(self):
+        """Run all test scenarios, then write the collected console output at once"""
+        try:
+            # Line buffered: each result reaches disk as soon as it is logged
+            with open(RESULTS_PATH, 'w', encoding='utf-8', buffering=1) as self._log_fp:
+                return await self._run_all_tests()
+        finally:
+            self._log_fp = None
+            sys.stdout.write(self._out.getvalue())
+            sys.stdout.flush()
+    
+    async def _run_all_tests(self):
+        print(f"🧪 Starting Smart Health Surveillance API Tests", file=self._out)
+        print(f"🌐 Base URL: {self.base_url}", file=self._out)
+        print(f"👤 Test User: {TEST_USERNAME}", file=self._out)
+        print("=" * 60, file=self._out)
         
-        # Test sequence
-        tests = [
+        # Need no token, so they run alongside the authenticated group
+        public_tests = [
             ("API Root", self.test_api_root),
-            ("Valid Authentication", self.test_authentication_valid),
             ("Invalid Authentication", self.test_authentication_invalid),
+            ("Prediction - No Auth", self.test_prediction_without_auth),
+        ]
+        # Need the token from the valid login, which runs first on its own
+        auth_tests = [
             ("Prediction - Good Water", self.test_prediction_good_water_quality),
             ("Prediction - Poor Water", self.test_prediction_poor_water_quality),
-            ("Prediction - No Auth", self.test_prediction_without_auth),
             ("Prediction - Missing Params", self.test_prediction_missing_parameters),
             ("Notification Trigger", self.test_notification_trigger),
             ("Prediction History", self.test_prediction_history),
@@ -536,39 +598,60 @@ class HealthSurveillanceAPITester:
         passed = 0
         failed = 0
         
-        for test_name, test_func in tests:
-            print(f"\n🔍 Running: {test_name}")
-            if test_func():
+        # One keep-alive pool sized to hold every concurrent test's connection;
+        # over HTTPS the tests multiplex as HTTP/2 streams on a single connection
+        limits = httpx.Limits(max_connections=16, max_keepalive_connections=16, keepalive_expiry=30)
+        async with httpx.AsyncClient(
+            http2=True, base_url=self.base_url, timeout=10.0, limits=limits
+        ) as client:
+            print(f"\n🔍 Running: Valid Authentication", file=self._out)
+            outcomes = [await self.test_authentication_valid(client)]
+            
+            concurrent_tests = list(public_tests)
+            if self.access_token:
+                concurrent_tests += auth_tests
+            else:
+                # One entry for the whole group rather than one per test
+                self.log_test(
+                    "Auth-dependent tests",
+                    False,
+                    f"Skipped: no token ({', '.join(name for name, _ in auth_tests)})",
+                    {"requires_auth": True}
+                )
+                outcomes.append(False)
+            
+            print(f"\n🔍 Running concurrently: {', '.join(name for name, _ in concurrent_tests)}", file=self._out)
+            outcomes += await asyncio.gather(
+                *(test_func(client) for _, test_func in concurrent_tests)
+            )
+        
+        for outcome in outcomes:
+            if outcome:
                 passed += 1
             else:
                 failed += 1
-            time.sleep(0.5)  # Brief pause between tests
         
         # Summary
-        print("\n" + "=" * 60)
-        print(f"📊 TEST SUMMARY")
-        print(f"✅ Passed: {passed}")
-        print(f"❌ Failed: {failed}")
-        print(f"📈 Success Rate: {(passed/(passed+failed)*100):.1f}%")
+        print("\n" + "=" * 60, file=self._out)
+        print(f"📊 TEST SUMMARY", file=self._out)
+        print(f"✅ Passed: {passed}", file=self._out)
+        print(f"❌ Failed: {failed}", file=self._out)
+        print(f"📈 Success Rate: {(passed/(passed+failed)*100):.1f}%", file=self._out)
         
         if failed > 0:
-            print(f"\n🚨 FAILED TESTS:")
+            print(f"\n🚨 FAILED TESTS:", file=self._out)
             for result in self.test_results:
                 if not result["success"]:
-                    print(f"   • {result['test']}: {result['message']}")
+                    print(f"   • {result['test']}: {result['message']}", file=self._out)
         
         return passed, failed, self.test_results
 
 def main():
     """Main test execution"""
     tester = HealthSurveillanceAPITester()
-    passed, failed, results = tester.run_all_tests()
-    
-    # Save detailed results
-    with open('/app/test_results_detailed.json', 'w') as f:
-        json.dump(results, f, indent=2)
+    passed, failed, results = asyncio.run(tester.run_all_tests())
     
-    print(f"\n💾 Detailed results saved to: /app/test_results_detailed.json")
+    print(f"\n💾 Detailed results saved to: {RESULTS_PATH}")
     
     # Exit with appropriate code
     sys.exit(0 if failed == 0 else 1)